@@ -1,16 +1,37 @@
 import os
+import json
+import asyncio
+import shutil
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from logging.handlers import MemoryHandler
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import schedule
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 import time
 import logging
 import argparse
-from urllib.parse import urlparse
-from datetime import datetime
-import pytz
+from urllib.parse import urlparse, unquote
+from datetime import datetime, timedelta, time as dt_time
+from zoneinfo import ZoneInfo
 
 # Standard-Konfiguration
 DEFAULT_DOWNLOAD_DIR = "downloads"
 REPOSITORIES_FILE = "repositories.txt"  # Datei mit GitHub-URLs
+ETAG_CACHE_FILE = "etag_cache.json"  # Cache für ETags der API-Antworten
+STATE_FILE = "state.json"  # Gespeicherte Versionsstände aller Repositories
+STATE_FLUSH_DELAY = 1.0  # Sekunden, in denen Zustandsänderungen gesammelt und gemeinsam geschrieben werden
+MAX_CONCURRENT_REPOS = 10  # Maximale Anzahl gleichzeitig verarbeiteter Repositories
+MAX_ASSET_WORKERS = 4  # Maximale Anzahl paralleler Asset-Downloads pro Release
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # Blockgröße beim Schreiben von Downloads (1 MiB)
+RATE_LIMIT_THRESHOLD = 50  # Unterhalb dieser Restanzahl wird bis zum Reset gewartet (höchstens 10 % des Limits)
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+CHECK_TIME = "10:00"  # Uhrzeit der täglichen Prüfung
+RETRY_STATUS_CODES = (429,)  # Statuscodes, bei denen API-Anfragen wiederholt werden (403 nur bei Rate-Limit, 5xx im HTTPAdapter)
+MAX_RETRIES = 6  # Maximale Anzahl Wiederholungen (Wartezeiten 1, 2, 4, 8, 16, 32 Sekunden)
 
 # Argument Parser für flexibles Download-Verzeichnis
 parser = argparse.ArgumentParser(description='GitHub Releases und Master Branch Downloader für mehrere Repositories')
@@ -20,9 +41,111 @@ args = parser.parse_args()
 
 DOWNLOAD_DIR = args.download_dir
 REPOSITORIES_FILE = args.repositories_file
-
-# Logging Einrichtung
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+ETAG_CACHE_PATH = os.path.join(DOWNLOAD_DIR, ETAG_CACHE_FILE)
+STATE_PATH = os.path.join(DOWNLOAD_DIR, STATE_FILE)
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')  # Optional für die REST-API, für die GraphQL-API erforderlich
+
+# Logging Einrichtung: Meldungen werden gepuffert und gesammelt ausgegeben, Warnungen und Fehler sofort
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+log_buffer = MemoryHandler(capacity=100, flushLevel=logging.WARNING, target=log_stream_handler)
+logging.root.setLevel(logging.INFO)
+logging.root.addHandler(log_buffer)
+
+def load_etag_cache():
+    """Lädt den ETag-Cache (URL -> {etag, body}) aus der JSON-Datei."""
+    if not os.path.exists(ETAG_CACHE_PATH):
+        return {}
+    try:
+        with open(ETAG_CACHE_PATH, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"ETag-Cache konnte nicht gelesen werden: {e}")
+        return {}
+
+def save_etag_cache():
+    """Speichert den ETag-Cache atomar über eine temporäre Datei und os.replace in der JSON-Datei."""
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    with etag_cache_lock:
+        temp_path = ETAG_CACHE_PATH + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(etag_cache, file)
+        os.replace(temp_path, ETAG_CACHE_PATH)
+
+def load_state():
+    """Lädt den Zustand aller Repositories (repo -> {release, master}) aus der JSON-Datei."""
+    if not os.path.exists(STATE_PATH):
+        return {}
+    try:
+        with open(STATE_PATH, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"Zustandsdatei konnte nicht gelesen werden: {e}")
+        return {}
+
+def flush_state():
+    """Schreibt den Zustand atomar über eine temporäre Datei und os.replace nach state.json."""
+    global state_flush_timer
+    with state_lock:
+        state_flush_timer = None
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        temp_path = STATE_PATH + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(STATE, file, indent=2)
+        os.replace(temp_path, STATE_PATH)
+
+def get_state(repo, key):
+    """Gibt den gespeicherten Stand ('release' oder 'master') eines Repositories zurück."""
+    with state_lock:
+        return STATE.get(repo, {}).get(key)
+
+def update_state(repo, key, value):
+    """Aktualisiert den Stand eines Repositories; mehrere Änderungen innerhalb von STATE_FLUSH_DELAY werden gemeinsam geschrieben."""
+    global state_flush_timer
+    with state_lock:
+        STATE.setdefault(repo, {})[key] = value
+        if state_flush_timer is None:
+            state_flush_timer = threading.Timer(STATE_FLUSH_DELAY, flush_state)
+            state_flush_timer.start()
+
+# Zustand einmalig beim Start in den Speicher laden
+STATE = load_state()
+state_lock = threading.Lock()
+state_flush_timer = None
+
+# Gemeinsame HTTP-Session mit Keep-Alive und Connection-Pool für alle Anfragen
+SESSION = requests.Session()
+SESSION.headers.update({'Accept': 'application/vnd.github+json', 'User-Agent': 'repo-downloader'})
+SESSION.mount('https://', HTTPAdapter(
+    pool_connections=20,
+    # Groß genug für alle parallelen Asset-Downloads aller gleichzeitig verarbeiteten Repositories
+    pool_maxsize=MAX_CONCURRENT_REPOS * MAX_ASSET_WORKERS,
+    # raise_on_status=False: nach erschöpften Wiederholungen die Antwort zurückgeben statt RetryError auszulösen
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False),
+))
+if GITHUB_TOKEN:
+    # Authentifizierte Anfragen: 5000 statt 60 API-Anfragen pro Stunde
+    SESSION.headers['Authorization'] = f"Bearer {GITHUB_TOKEN}"
+    SESSION.headers['X-GitHub-Api-Version'] = '2022-11-28'
+
+# Zuletzt gemeldeter Stand des primären GitHub-Rate-Limits
+rate_limit = {'limit': None, 'remaining': None, 'reset': None}
+rate_limit_lock = threading.Lock()
+
+# ETag-Cache einmalig beim Start laden (Zugriffe aus mehreren Threads über Lock geschützt)
+etag_cache = load_etag_cache()
+etag_cache_lock = threading.Lock()
+
+@dataclass(frozen=True, slots=True)
+class RepoPaths:
+    """Einmalig berechnete URLs und Dateipfade eines Repositories."""
+    owner: str
+    repo: str
+    api_url: str
+    repo_dir: str
+    releases_dir: str
+    release_notes_file: str
+    master_zip_path: str
 
 def load_repositories(file_path):
     """Lädt eine Liste von GitHub-Repository-URLs aus einer Datei."""
@@ -34,6 +157,7 @@ def load_repositories(file_path):
     logging.info(f"{len(urls)} Repository(ies) geladen.")
     return urls
 
+@lru_cache(maxsize=None)
 def parse_github_url(repo_url):
     """Parst die GitHub-URL und gibt den Besitzer und Repository-Namen zurück."""
     parsed_url = urlparse(repo_url)
@@ -51,44 +175,295 @@ def setup_repository_dirs(owner, repo):
     os.makedirs(releases_dir, exist_ok=True)
     return repo_dir, releases_dir
 
+@lru_cache(maxsize=None)
 def get_github_api_url(owner, repo):
     """Konstruiert die GitHub-API-URL für ein Repository."""
     return f"https://api.github.com/repos/{owner}/{repo}"
 
+def update_rate_limit(response):
+    """Übernimmt X-RateLimit-Limit, X-RateLimit-Remaining und X-RateLimit-Reset aus einer API-Antwort."""
+    # Nur das REST-Kontingent (core) verfolgen; GraphQL und andere Ressourcen haben eigene Limits
+    if response.headers.get('X-RateLimit-Resource', 'core') != 'core':
+        return
+    remaining = response.headers.get('X-RateLimit-Remaining')
+    reset = response.headers.get('X-RateLimit-Reset')
+    if remaining is None or reset is None:
+        return
+    limit = response.headers.get('X-RateLimit-Limit')
+    with rate_limit_lock:
+        rate_limit['limit'] = int(limit) if limit is not None else None
+        rate_limit['remaining'] = int(remaining)
+        rate_limit['reset'] = int(reset)
+
+def wait_for_rate_limit():
+    """Wartet bis zum Reset des Rate-Limits, falls nur noch wenige Anfragen übrig sind."""
+    with rate_limit_lock:
+        limit, remaining, reset = rate_limit['limit'], rate_limit['remaining'], rate_limit['reset']
+    # Schwelle am tatsächlichen Limit ausrichten: ohne Token (60/h) nicht schon nach wenigen Anfragen warten
+    threshold = min(RATE_LIMIT_THRESHOLD, limit // 10) if limit else RATE_LIMIT_THRESHOLD
+    if remaining is None or remaining >= max(threshold, 1):
+        return
+    delay = max(0, reset - time.time())
+    if delay:
+        logging.warning(f"Rate-Limit fast erschöpft ({remaining} Anfragen übrig). Warte {delay:.0f} Sekunden bis zum Reset...")
+        time.sleep(delay)
+
+def is_retryable(response):
+    """Prüft, ob eine API-Antwort wegen Rate-Limit wiederholt werden soll (Serverfehler wiederholt bereits der HTTPAdapter)."""
+    if response.status_code == 403:
+        # 403 nur bei erschöpftem oder sekundärem Rate-Limit wiederholen, nicht bei gesperrten Repositories
+        return response.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in response.headers
+    return response.status_code in RETRY_STATUS_CODES
+
+def rate_limited_get(url, **kwargs):
+    """Führt einen GET-Request auf die GitHub-API unter Beachtung des Rate-Limits aus, mit exponentiellem Backoff."""
+    for attempt in range(MAX_RETRIES + 1):
+        wait_for_rate_limit()
+        response = SESSION.get(url, **kwargs)
+        update_rate_limit(response)
+        if not is_retryable(response) or attempt == MAX_RETRIES:
+            return response
+
+        delay = 2 ** attempt
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        logging.warning(f"HTTP {response.status_code} für {url}. Neuer Versuch in {delay} Sekunden...")
+        time.sleep(delay)
+
+def conditional_get(url, extract=None, headers=None):
+    """Führt einen bedingten GET-Request (If-None-Match) aus und liefert bei 304 die zwischengespeicherte Antwort.
+
+    extract reduziert die Antwort auf die benötigten Felder, bevor sie zurückgegeben und zwischengespeichert wird.
+    """
+    headers = dict(headers or {})
+    entry = etag_cache.get(url)
+    conditional_headers = {**headers, 'If-None-Match': entry['etag']} if entry else headers
+    response = rate_limited_get(url, headers=conditional_headers)
+    if response.status_code == 304:
+        if 'body' in entry:
+            return entry['body']
+        # 304 ohne zwischengespeicherten Inhalt: unbedingt neu abrufen
+        response = rate_limited_get(url, headers=headers)
+    response.raise_for_status()
+    body = extract(response) if extract else response.json()
+    etag = response.headers.get('ETag')
+    if etag:
+        with etag_cache_lock:
+            etag_cache[url] = {'etag': etag, 'body': body}
+        save_etag_cache()
+    return body
+
+def get_latest_release_tag(owner, repo):
+    """Ermittelt den Tag der neuesten Veröffentlichung über die Weiterleitung von github.com, ohne API-Kontingent zu verbrauchen."""
+    try:
+        response = SESSION.head(f"https://github.com/{owner}/{repo}/releases/latest", allow_redirects=False)
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"HEAD-Request für die neueste Veröffentlichung von {repo} fehlgeschlagen: {e}")
+        return None
+    location = response.headers.get('Location', '')
+    if not response.is_redirect or '/tag/' not in location:
+        return None
+    return unquote(location.rsplit('/tag/', 1)[-1])
+
+def extract_release(response):
+    """Reduziert eine Release-Antwort auf Tag, Ziel-Commit und Download-URLs der Assets."""
+    release = response.json()
+    return {
+        'tag_name': release['tag_name'],
+        'target_commitish': release['target_commitish'],
+        'assets': [
+            {'name': asset['name'], 'browser_download_url': asset['browser_download_url']}
+            for asset in release.get('assets', [])
+        ]
+    }
+
 def get_latest_release(api_url):
     """Holt die neueste Veröffentlichung von GitHub."""
     url = f"{api_url}/releases/latest"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+    return conditional_get(url, extract=extract_release)
 
 def get_latest_commit(api_url, branch='master'):
-    """Holt den neuesten Commit eines angegebenen Branches."""
+    """Holt den neuesten Commit eines angegebenen Branches (nur den SHA)."""
     url = f"{api_url}/commits/{branch}"
-    response = requests.get(url)
-    response.raise_for_status()
-    return response.json()
+    # Der Medientyp vnd.github.sha liefert nur den SHA als Text statt des vollständigen Commits samt Diffs
+    return conditional_get(url, extract=lambda response: {'sha': response.text.strip()},
+                           headers={'Accept': 'application/vnd.github.sha'})
+
+def graphql_poll(repos):
+    """Fragt neuesten Release-Tag und Master-Commit aller Repositories mit einer einzigen GraphQL-Anfrage ab.
+
+    Gibt ein Dict {repo: (tag, release_sha, master_sha)} zurück oder None, falls die Abfrage nicht möglich ist.
+    """
+    if not GITHUB_TOKEN:
+        logging.info("Kein GITHUB_TOKEN gesetzt. Repositories werden einzeln über die REST-API geprüft.")
+        return None
+    if not repos:
+        return {}
+
+    fields = []
+    for index, paths in enumerate(repos):
+        fields.append(
+            f"r{index}: repository(owner: {json.dumps(paths.owner)}, name: {json.dumps(paths.repo)}) {{ "
+            "latestRelease { tagName tagCommit { oid } } "
+            'ref(qualifiedName: "refs/heads/master") { target { oid } } }'
+        )
+    query = "query { " + " ".join(fields) + " }"
+
+    try:
+        response = SESSION.post(GITHUB_GRAPHQL_URL, json={'query': query})
+        response.raise_for_status()
+        data = response.json().get('data') or {}
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.error(f"Fehler bei der GraphQL-Abfrage: {e}")
+        return None
+
+    results = {}
+    for index, paths in enumerate(repos):
+        node = data.get(f"r{index}")
+        if node is None:
+            continue
+        release = node.get('latestRelease') or {}
+        tag = release.get('tagName')
+        release_sha = (release.get('tagCommit') or {}).get('oid')
+        master_sha = ((node.get('ref') or {}).get('target') or {}).get('oid')
+        results[paths.repo] = (tag, release_sha, master_sha)
+    return results
+
+def read_version_info(version_file):
+    """Liest eine (veraltete) Versionsdatei und gibt ihre Felder zurück, oder None, falls sie nicht existiert."""
+    if not os.path.exists(version_file):
+        return None
+    with open(version_file, 'r', encoding='utf-8') as file:
+        # Höchstens drei Felder: das letzte (Last-Modified) enthält selbst Kommas
+        return file.read().strip().split(',', 2)
+
+def migrate_version_files(paths):
+    """Übernimmt vorhandene version_info_*.txt eines Repositories in den Zustand, falls dort noch nichts gespeichert ist."""
+    release_info = read_version_info(os.path.join(paths.repo_dir, "version_info_release.txt"))
+    if release_info and len(release_info) >= 2 and get_state(paths.repo, 'release') is None:
+        update_state(paths.repo, 'release', {'tag': release_info[0], 'commit': release_info[1]})
+
+    master_info = read_version_info(os.path.join(paths.repo_dir, "version_info_master.txt"))
+    if master_info and len(master_info) >= 2 and get_state(paths.repo, 'master') is None:
+        last_modified = master_info[2] if len(master_info) > 2 else ''
+        update_state(paths.repo, 'master', {'branch': master_info[0], 'sha': master_info[1], 'last_modified': last_modified})
+
+def has_changes(paths, polled):
+    """Vergleicht das Ergebnis der GraphQL-Abfrage mit dem gespeicherten Zustand eines Repositories."""
+    if polled is None or paths.repo not in polled:
+        return True
+    tag, _, master_sha = polled[paths.repo]
+    release_info = get_state(paths.repo, 'release')
+    master_info = get_state(paths.repo, 'master')
+    if tag is not None and (release_info is None or release_info['tag'] != tag):
+        return True
+    if master_sha is not None and (master_info is None or master_info['sha'] != master_sha):
+        return True
+    return False
+
+def range_validator(headers):
+    """Gibt den für If-Range nutzbaren Validator (starkes ETag, sonst Last-Modified) einer Antwort zurück."""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+def discard_partial_download(part_path):
+    """Löscht eine .part-Datei samt gespeichertem Validator."""
+    for path in (part_path, part_path + '.validator'):
+        if os.path.exists(path):
+            os.remove(path)
 
 def download_file(url, dest):
-    """Lädt eine Datei von einer gegebenen URL herunter."""
+    """Lädt eine Datei von einer gegebenen URL herunter und gibt die Antwort-Header zurück (None bei Fehlern).
+
+    Der Download wird in eine .part-Datei geschrieben; ein abgebrochener Download wird per Range-Request fortgesetzt,
+    sofern sich die Datei auf dem Server laut If-Range seitdem nicht geändert hat.
+    """
+    part_path = dest + '.part'
+    validator_path = part_path + '.validator'
     try:
-        response = requests.get(url, stream=True)
+        pos = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = read_sidecar(validator_path) if pos else None
+        # Ohne Validator lässt sich nicht prüfen, ob die Teildatei noch zur Datei auf dem Server gehört
+        headers = {'Range': f"bytes={pos}-", 'If-Range': validator} if validator else {}
+        with SESSION.get(url, stream=True, headers=headers) as response:
+            if response.status_code == 416 and headers:
+                # Teildatei passt nicht mehr zur Datei auf dem Server: komplett neu herunterladen
+                discard_partial_download(part_path)
+                return download_file(url, dest)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Bei 200 statt 206 hat sich die Datei geändert oder der Server unterstützt keinen Range-Request: von vorne beginnen
+            mode = 'ab' if response.status_code == 206 else 'wb'
+            if mode == 'ab':
+                logging.info("Setze Download von %s bei Byte %d fort.", dest, pos)
+            else:
+                new_validator = range_validator(response.headers)
+                if new_validator:
+                    with open(validator_path, 'w', encoding='utf-8') as file:
+                        file.write(new_validator)
+                elif os.path.exists(validator_path):
+                    os.remove(validator_path)
+            with open(part_path, mode, buffering=DOWNLOAD_CHUNK_SIZE) as file:
+                shutil.copyfileobj(response.raw, file, length=DOWNLOAD_CHUNK_SIZE)
+        os.replace(part_path, dest)
+        discard_partial_download(part_path)
+        logging.info("Heruntergeladen: %s", dest)
+        return response.headers
+    except (requests.exceptions.RequestException, Urllib3HTTPError) as e:
+        # Lesefehler aus response.raw (z.B. abgebrochene Verbindung) kommen unverpackt von urllib3
+        logging.error(f"Fehler beim Herunterladen von {url}: {e}")
+        return None
+
+def read_sidecar(path):
+    """Liest den Inhalt einer Begleitdatei (z.B. .etag), oder None, falls sie nicht existiert."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read().strip()
+
+def is_asset_unchanged(url, dest):
+    """Prüft per HEAD-Request, ob Größe und ETag eines Assets mit der lokalen Datei übereinstimmen."""
+    cached_etag = read_sidecar(dest + '.etag')
+    if cached_etag is None or not os.path.exists(dest):
+        return False
+    try:
+        response = SESSION.head(url, allow_redirects=True)
         response.raise_for_status()
-        with open(dest, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        logging.info(f"Heruntergeladen: {dest}")
     except requests.exceptions.RequestException as e:
-        logging.error(f"Fehler beim Herunterladen von {url}: {e}")
+        logging.warning(f"HEAD-Request für {url} fehlgeschlagen: {e}")
+        return False
+    content_length = int(response.headers.get('Content-Length', -1))
+    return os.path.getsize(dest) == content_length and response.headers.get('ETag') == cached_etag
+
+def download_asset(url, dest):
+    """Lädt ein Release-Asset herunter, sofern es sich gegenüber der lokalen Kopie geändert hat.
+
+    Gibt True zurück, wenn das Asset danach lokal aktuell ist, sonst False.
+    """
+    if is_asset_unchanged(url, dest):
+        logging.info("Release-Asset unverändert, Download übersprungen: %s", dest)
+        return True
+    logging.info("Herunterladen des Release-Assets: %s", os.path.basename(dest))
+    headers = download_file(url, dest)
+    if headers is None:
+        return False
+    if headers.get('ETag'):
+        with open(dest + '.etag', 'w', encoding='utf-8') as file:
+            file.write(headers['ETag'])
+    return True
 
 def download_release_assets(release, releases_dir):
-    """Lädt alle Assets einer Veröffentlichung herunter."""
+    """Lädt alle geänderten Assets einer Veröffentlichung parallel herunter und gibt zurück, ob alle erfolgreich waren."""
+    urls, dest_paths = [], []
     for asset in release.get('assets', []):
-        asset_url = asset['browser_download_url']
-        asset_name = asset['name']
-        dest_path = os.path.join(releases_dir, asset_name)
-        logging.info(f"Herunterladen des Release-Assets: {asset_name}")
-        download_file(asset_url, dest_path)
+        urls.append(asset['browser_download_url'])
+        dest_paths.append(os.path.join(releases_dir, asset['name']))
+
+    with ThreadPoolExecutor(max_workers=MAX_ASSET_WORKERS) as executor:
+        return all(list(executor.map(download_asset, urls, dest_paths)))
 
 def generate_release_notes(commits, release_notes_path):
     """Generiert Release-Notizen basierend auf Commits."""
@@ -102,127 +477,180 @@ def generate_release_notes(commits, release_notes_path):
             file.write(f"- {message} (von {author} am {date})\n")
     logging.info(f"Release-Notizen generiert: {release_notes_path}")
 
-def check_and_download_release(api_url, repo_dir, releases_dir, version_file, release_notes_file):
+def check_and_download_release(api_url, owner, repo, repo_dir, releases_dir, release_notes_file):
     """Überprüft auf neue Releases und lädt diese herunter."""
     try:
+        # Günstige Vorprüfung: Tag aus der Weiterleitung von /releases/latest mit dem gespeicherten vergleichen
+        current = get_state(repo, 'release')
+        if current and get_latest_release_tag(owner, repo) == current['tag']:
+            logging.info(f"Neueste Veröffentlichung ({current['tag']}) bereits heruntergeladen.")
+            return
+
         latest_release = get_latest_release(api_url)
         latest_version = latest_release['tag_name']
         latest_commit_hash = latest_release['target_commitish']
 
         # Prüfen, ob diese Version bereits heruntergeladen wurde
-        if os.path.exists(version_file):
-            with open(version_file, 'r', encoding='utf-8') as file:
-                current_version, current_hash = file.read().strip().split(',')
-            if current_version == latest_version and current_hash == latest_commit_hash:
-                logging.info(f"Neueste Veröffentlichung ({latest_version}) bereits heruntergeladen.")
-                return
+        if current and current['tag'] == latest_version and current['commit'] == latest_commit_hash:
+            logging.info(f"Neueste Veröffentlichung ({latest_version}) bereits heruntergeladen.")
+            return
 
         # Neue Veröffentlichung gefunden
         logging.info(f"Neue Veröffentlichung gefunden: {latest_version}. Download beginnt...")
-        download_release_assets(latest_release, releases_dir)
+        if not download_release_assets(latest_release, releases_dir):
+            # Versionsinfo nicht aktualisieren, damit die fehlenden Assets bei der nächsten Prüfung fortgesetzt werden
+            logging.error(f"Nicht alle Assets von {latest_version} konnten heruntergeladen werden.")
+            return
 
         # Optional: Commit-Historie seit letztem Release abrufen (hier Platzhalter)
         generate_release_notes([], release_notes_file)  # Placeholder für tatsächliche Commits
 
         # Versionsinfo aktualisieren
-        with open(version_file, 'w', encoding='utf-8') as file:
-            file.write(f"{latest_version},{latest_commit_hash}")
+        update_state(repo, 'release', {'tag': latest_version, 'commit': latest_commit_hash})
         logging.info(f"Versionsinfo aktualisiert: {latest_version}")
     except requests.exceptions.HTTPError as e:
         logging.error(f"HTTP-Fehler beim Abrufen der neuesten Veröffentlichung: {e}")
     except Exception as e:
         logging.error(f"Unbekannter Fehler bei der Überprüfung der Veröffentlichung: {e}")
 
-def check_and_download_master(api_url, repo_dir, master_zip_path, version_file_master, branch='master'):
+def check_and_download_master(api_url, owner, repo, repo_dir, master_zip_path, branch='master'):
     """Überprüft auf neue Commits im Hauptbranch und lädt den aktuellen Stand herunter."""
     try:
+        master_zip_url = f"https://github.com/{owner}/{repo}/archive/refs/heads/{branch}.zip"
+        master_info = get_state(repo, 'master')
+
+        # Günstige Vorprüfung: HEAD auf das Archiv mit If-Modified-Since des letzten Downloads
+        if master_info and master_info.get('last_modified') and os.path.exists(master_zip_path):
+            try:
+                response = SESSION.head(master_zip_url, headers={'If-Modified-Since': master_info['last_modified']}, allow_redirects=True)
+            except requests.exceptions.RequestException as e:
+                # Vorprüfung fehlgeschlagen: normal über die API weiterprüfen
+                logging.warning(f"HEAD-Request für {master_zip_url} fehlgeschlagen: {e}")
+                response = None
+            if response is not None and response.status_code == 304:
+                logging.info("Hauptbranch ist auf dem neuesten Stand.")
+                return
+
         latest_commit = get_latest_commit(api_url, branch)
         latest_commit_hash = latest_commit['sha']
 
         # Prüfen, ob dieser Commit bereits heruntergeladen wurde
-        if os.path.exists(version_file_master):
-            with open(version_file_master, 'r', encoding='utf-8') as file:
-                _, current_hash = file.read().strip().split(',')
-            if current_hash == latest_commit_hash:
-                logging.info("Hauptbranch ist auf dem neuesten Stand.")
-                return
+        if master_info and master_info['sha'] == latest_commit_hash:
+            logging.info("Hauptbranch ist auf dem neuesten Stand.")
+            return
 
         # Neuer Commit gefunden
         logging.info("Neuer Commit im Hauptbranch gefunden. Download beginnt...")
-        master_zip_url = f"https://github.com/{parse_github_url(api_url)[0]}/{parse_github_url(api_url)[1]}/archive/refs/heads/{branch}.zip"
-        download_file(master_zip_url, master_zip_path)
+        headers = download_file(master_zip_url, master_zip_path)
+        if headers is None:
+            return
+        last_modified = headers.get('Last-Modified', '')
 
-        # Versionsinfo für den Hauptbranch aktualisieren
-        with open(version_file_master, 'w', encoding='utf-8') as file:
-            file.write(f"{branch},{latest_commit_hash}")
+        # Versionsinfo (inkl. Last-Modified des Archivs) für den Hauptbranch aktualisieren
+        update_state(repo, 'master', {'branch': branch, 'sha': latest_commit_hash, 'last_modified': last_modified})
         logging.info(f"Hauptbranch-Version aktualisiert: {latest_commit_hash}")
     except requests.exceptions.HTTPError as e:
         logging.error(f"HTTP-Fehler beim Abrufen des neuesten Commits: {e}")
     except Exception as e:
         logging.error(f"Unbekannter Fehler bei der Überprüfung des Hauptbranches: {e}")
 
-def initial_download(owner, repo, api_url, repo_dir, releases_dir):
+def initial_download(paths):
     """Führt die initialen Downloads von Master und Releases durch."""
-    version_file_release = os.path.join(repo_dir, "version_info_release.txt")
-    version_file_master = os.path.join(repo_dir, "version_info_master.txt")
-    release_notes_file = os.path.join(repo_dir, "release_notes.txt")
-    master_zip_path = os.path.join(repo_dir, f"{repo}_master.zip")
+    logging.info(f"Initialer Download für Repository: {paths.repo}")
+    # Sofort ausgeben, damit lange Downloads nicht ohne sichtbare Meldung laufen
+    log_buffer.flush()
+    check_and_download_master(paths.api_url, paths.owner, paths.repo, paths.repo_dir, paths.master_zip_path)
+    check_and_download_release(paths.api_url, paths.owner, paths.repo, paths.repo_dir, paths.releases_dir, paths.release_notes_file)
 
-    logging.info(f"Initialer Download für Repository: {repo}")
-    check_and_download_master(api_url, repo_dir, master_zip_path, version_file_master)
-    check_and_download_release(api_url, repo_dir, releases_dir, version_file_release, release_notes_file)
-
-def daily_check(owner, repo, api_url, repo_dir, releases_dir):
+def daily_check(paths):
     """Führt tägliche Überprüfungen auf Updates durch."""
-    version_file_release = os.path.join(repo_dir, "version_info_release.txt")
-    version_file_master = os.path.join(repo_dir, "version_info_master.txt")
-    release_notes_file = os.path.join(repo_dir, "release_notes.txt")
-    master_zip_path = os.path.join(repo_dir, f"{repo}_master.zip")
-
-    logging.info(f"Tägliche Überprüfung gestartet für Repository: {repo}")
-    check_and_download_master(api_url, repo_dir, master_zip_path, version_file_master)
-    check_and_download_release(api_url, repo_dir, releases_dir, version_file_release, release_notes_file)
-    logging.info(f"Tägliche Überprüfung abgeschlossen für Repository: {repo}")
+    logging.info(f"Tägliche Überprüfung gestartet für Repository: {paths.repo}")
+    log_buffer.flush()
+    check_and_download_master(paths.api_url, paths.owner, paths.repo, paths.repo_dir, paths.master_zip_path)
+    check_and_download_release(paths.api_url, paths.owner, paths.repo, paths.repo_dir, paths.releases_dir, paths.release_notes_file)
+    logging.info(f"Tägliche Überprüfung abgeschlossen für Repository: {paths.repo}")
 
 def process_repository(repo_url):
-    """Verarbeitet ein einzelnes GitHub-Repository."""
+    """Verarbeitet ein einzelnes GitHub-Repository und gibt dessen RepoPaths zurück."""
     owner, repo = parse_github_url(repo_url)
     if not owner or not repo:
-        return
+        return None
 
     repo_dir, releases_dir = setup_repository_dirs(owner, repo)
-    api_url = get_github_api_url(owner, repo)
-
-    version_file_release = os.path.join(repo_dir, "version_info_release.txt")
-    version_file_master = os.path.join(repo_dir, "version_info_master.txt")
-    release_notes_file = os.path.join(repo_dir, "release_notes.txt")
-    master_zip_path = os.path.join(repo_dir, f"{repo}_master.zip")
-
-    # Initialer Download, falls Versionsdateien nicht vorhanden sind
-    if not os.path.exists(version_file_master) or not os.path.exists(version_file_release):
-        initial_download(owner, repo, api_url, repo_dir, releases_dir)
-
-    # Planung täglicher Prüfungen
-    schedule_time = "10:00"
-    schedule.every().day.at(schedule_time).do(daily_check, owner, repo, api_url, repo_dir, releases_dir)
-    logging.info(f"Geplante tägliche Prüfungen um {schedule_time} Uhr für Repository: {repo}")
+    paths = RepoPaths(
+        owner=owner,
+        repo=repo,
+        api_url=get_github_api_url(owner, repo),
+        repo_dir=repo_dir,
+        releases_dir=releases_dir,
+        release_notes_file=os.path.join(repo_dir, "release_notes.txt"),
+        master_zip_path=os.path.join(repo_dir, f"{repo}_master.zip"),
+    )
+
+    # Initialer Download, falls noch kein Stand für Master oder Releases gespeichert ist
+    migrate_version_files(paths)
+    if get_state(repo, 'master') is None or get_state(repo, 'release') is None:
+        initial_download(paths)
+
+    return paths
+
+async def run_concurrently(func, items):
+    """Führt func für alle Einträge parallel in Worker-Threads aus (höchstens MAX_CONCURRENT_REPOS gleichzeitig)."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REPOS)
+
+    async def worker(item):
+        async with semaphore:
+            return await asyncio.to_thread(func, item)
+
+    return await asyncio.gather(*(worker(item) for item in items))
+
+async def daily_check_all(repos):
+    """Prüft alle Repositories mit einer GraphQL-Abfrage und führt die tägliche Prüfung nur für geänderte aus."""
+    polled = await asyncio.to_thread(graphql_poll, repos)
+    changed = []
+    for paths in repos:
+        if has_changes(paths, polled):
+            changed.append(paths)
+        else:
+            logging.info(f"Keine Änderungen für Repository: {paths.repo}")
+    await run_concurrently(daily_check, changed)
+
+def next_check_time(timezone, after):
+    """Berechnet den ersten Zeitpunkt der täglichen Prüfung (CHECK_TIME) nach after in der angegebenen Zeitzone."""
+    hour, minute = map(int, CHECK_TIME.split(':'))
+    day = after.date()
+    while True:
+        # Für jeden Tag neu mit der Zeitzone verknüpfen, damit die Uhrzeit auch über Sommer-/Winterzeitwechsel stimmt
+        candidate = datetime.combine(day, dt_time(hour, minute), tzinfo=timezone)
+        if candidate > after:
+            return candidate
+        day += timedelta(days=1)
+
+async def run_scheduler(repos, timezone):
+    """Schläft bis zur nächsten Prüfungszeit und führt dann die tägliche Prüfung aller Repositories aus."""
+    next_run = next_check_time(timezone, datetime.now(timezone))
+    while True:
+        logging.info(f"Nächste Prüfung am {next_run:%d.%m.%Y um %H:%M %Z}.")
+        # Gepufferte Meldungen vor dem Schlafen ausgeben, damit sie nicht bis zur nächsten Prüfung liegen bleiben
+        log_buffer.flush()
+        await asyncio.sleep(max(0, (next_run - datetime.now(timezone)).total_seconds()))
+        await daily_check_all(repos)
+        next_run = next_check_time(timezone, max(next_run, datetime.now(timezone)))
 
 def main():
     """Hauptfunktion zur Ausführung des Skripts."""
     repositories = load_repositories(REPOSITORIES_FILE)
-    for repo_url in repositories:
-        process_repository(repo_url)
+    results = asyncio.run(run_concurrently(process_repository, repositories))
+    repos = [paths for paths in results if paths]
 
     # Zeitzone festlegen (z.B. Europe/Zurich)
-    timezone = pytz.timezone("Europe/Zurich")
+    timezone = ZoneInfo("Europe/Zurich")
 
-    logging.info(f"Update-Prüfer läuft. Tägliche Prüfungen um 10:00 Uhr in Zeitzone {timezone}.")
+    logging.info(f"Update-Prüfer läuft. Tägliche Prüfungen um {CHECK_TIME} Uhr in Zeitzone {timezone} für {len(repos)} Repository(ies).")
 
-    # Endlosschleife zur Ausführung geplanter Aufgaben
+    # Bis zur jeweils nächsten Prüfung schlafen, statt jede Sekunde aufzuwachen
     try:
-        while True:
-            schedule.run_pending()
-            time.sleep(1)
+        asyncio.run(run_scheduler(repos, timezone))
     except KeyboardInterrupt:
         logging.info("Update-Prüfer gestoppt vom Benutzer.")
 